@@ -30,3 +30,11 @@ CREATE TABLE IF NOT EXISTS news_hashes (
   ts TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   KEY (ts)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS fusion_leases (
+  market ENUM('crypto','stocks') NOT NULL,
+  worker_id VARCHAR(64) NOT NULL,
+  expires_at TIMESTAMP NOT NULL,
+  PRIMARY KEY (market, worker_id),
+  KEY (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -13,6 +13,13 @@ WEIGHTS = {
     "social": 0.5,
 }
 
+# Per-source quality multipliers applied on top of each row's quality
+SOURCE_WEIGHTS = {
+    "news": 1.0,
+    "stocktwits": 1.0,
+    "reddit": 1.0,
+}
+
 # Placeholder for regime gauge implementation
 REGIME_GAUGE = "crypto_vol"
 
@@ -14,6 +14,13 @@ WEIGHTS = {
     "social": 0.4,
 }
 
+# Per-source quality multipliers applied on top of each row's quality
+SOURCE_WEIGHTS = {
+    "news": 1.0,
+    "stocktwits": 1.0,
+    "reddit": 1.0,
+}
+
 # Placeholder for regime gauge implementation
 REGIME_GAUGE = "vix"
 
@@ -22,6 +22,14 @@ try:  # pragma: no cover - optional dependency
 except Exception as exc:  # pragma: no cover - handled gracefully
     logger.warning("Prometheus instrumentation disabled: %s", exc)
 
+try:  # pragma: no cover - optional dependency
+    from prometheus_client import Counter
+
+    SCORED_TEXTS = Counter("scorer_texts_total", "Texts scored", ["model"])
+    SCORER_FALLBACK = Counter("scorer_fallback_total", "Texts scored by the heuristic fallback")
+except Exception:  # pragma: no cover - metrics optional
+    SCORED_TEXTS = SCORER_FALLBACK = None
+
 
 class Item(BaseModel):
     texts: List[str]
@@ -82,6 +90,7 @@ try:  # pragma: no cover - heavy dependency; exercised in production
         return 0.0
 
     sentiment_fn: Callable[[str], float] = finbert_sentiment
+    MODEL_NAME = "finbert"
     logger.info("FinBERT model loaded")
 except Exception as exc:  # pragma: no cover - exercised when model unavailable
     logger.warning("FinBERT unavailable, using heuristic sentiment: %s", exc)
@@ -116,6 +125,7 @@ except Exception as exc:  # pragma: no cover - exercised when model unavailable
         return float(score)
 
     sentiment_fn = stub_sentiment
+    MODEL_NAME = "heuristic"
 
 
 def normalize(x: float) -> float:
@@ -125,6 +135,10 @@ def normalize(x: float) -> float:
 @app.post("/score")
 def score(item: Item):
     raw = [sentiment_fn(t) for t in item.texts]
+    if SCORED_TEXTS is not None:
+        SCORED_TEXTS.labels(model=MODEL_NAME).inc(len(raw))
+        if MODEL_NAME == "heuristic":
+            SCORER_FALLBACK.inc(len(raw))
     return {"scores": [normalize(x) for x in raw]}
 
 
@@ -1,2 +1,188 @@
+import sys
+import numpy as np
+import pytest
+sys.path.append('workers')
+from decay import DecayedSum, decayed_wavg
+
 def test_placeholder():
     assert 1 + 1 == 2
+
+
+def test_decayed_wavg_weights_recent_rows_more():
+    group = [0, 0, 1]
+    age = [0.0, 600.0, 0.0]
+    score = [80.0, 20.0, 40.0]
+    quality = [1.0, 1.0, 1.0]
+    mean, counts = decayed_wavg(group, age, score, quality, 3, half_life=600.0)
+    # the 10 minute old row has half the weight of the fresh one
+    assert np.isclose(mean[0], (80 + 0.5 * 20) / 1.5)
+    assert mean[1] == 40.0
+    assert np.isnan(mean[2])
+    assert list(counts) == [2, 1, 0]
+
+
+def test_decayed_wavg_without_half_life_is_plain_wavg():
+    mean, _ = decayed_wavg([0, 0], [0.0, 7200.0], [80.0, 20.0], [3.0, 1.0], 1, half_life=0)
+    assert np.isclose(mean[0], (3 * 80 + 20) / 4)
+
+
+NOW = 1_760_000_000.0  # realistic epoch seconds
+HALF_LIFE = 1800.0
+
+
+def test_decayed_sum_matches_batch_after_add_and_remove():
+    ts = NOW - np.array([5400.0, 3600.0, 600.0, 60.0])
+    group = np.array([0, 1, 0, 1])
+    score = np.array([70.0, 30.0, 60.0, 90.0])
+    quality = np.array([1.0, 0.5, 1.0, 2.0])
+    acc = DecayedSum(2, half_life=HALF_LIFE)
+    acc.add(group, ts, score, quality)
+    acc.remove(group[:1], ts[:1], score[:1], quality[:1])  # first row leaves the window
+    expected, _ = decayed_wavg(group[1:], NOW - ts[1:], score[1:], quality[1:], 2, HALF_LIFE)
+    assert np.all(np.isfinite(acc.num)) and np.all(np.isfinite(acc.den))
+    assert np.allclose(acc.mean(), expected)
+    assert np.allclose(acc.weight(NOW), [2 ** (-600 / HALF_LIFE), 0.5 * 2 ** -2 + 2.0 * 2 ** (-60 / HALF_LIFE)])
+    acc.rebase(NOW)
+    assert np.allclose(acc.mean(), expected)
+
+
+def test_decayed_sum_is_empty_after_removing_every_row():
+    rng = np.random.default_rng(7)
+    ts = NOW - rng.uniform(0, 7200, 5)
+    score = rng.uniform(0, 100, 5)
+    quality = rng.uniform(0.1, 2.0, 5)
+    group = np.zeros(5, dtype=np.intp)
+    acc = DecayedSum(2, half_life=HALF_LIFE)
+    acc.add(group, ts, score, quality)
+    acc.remove(group, ts, score, quality)
+    assert np.isnan(acc.mean()).all()
+    assert acc.weight(NOW)[0] == 0.0
+
+
+def test_decayed_sum_rebases_before_overflowing():
+    acc = DecayedSum(1, half_life=HALF_LIFE)
+    start = NOW
+    for day in range(30):  # 30 days is ~1440 half-lives
+        t = start + day * 86400.0
+        acc.add([0], [t], [40.0 + day], [1.0])
+        if day < 29:
+            acc.remove([0], [t], [40.0 + day], [1.0])
+    assert np.all(np.isfinite(acc.num)) and np.all(np.isfinite(acc.den))
+    assert np.isclose(acc.mean()[0], 69.0)
+    assert np.isclose(acc.weight(start + 29 * 86400.0)[0], 1.0)
+
+
+@pytest.fixture
+def fusion():
+    pytest.importorskip('MySQLdb')  # workers/utils.py needs the DB driver
+    import fusion
+    return fusion
+
+
+class FakeRawDB:
+    def __init__(self, market, rows=()):
+        self.market = market
+        self.rows = list(rows)  # (id, market, symbol) committed so far
+
+    def exec(self, q, args=None):
+        if 'MAX(id)' in q:
+            return [(max((r[0] for r in self.rows), default=0),)]
+        return [r for r in self.rows if r[0] > args[0]]
+
+    def add(self, id, symbol):
+        self.rows.append((id, self.market, symbol))
+
+
+def test_first_call_marks_everything_due_and_sets_watermark(fusion):
+    db = FakeRawDB(fusion.MARKET, [(1, fusion.MARKET, 'AAA'), (2, fusion.MARKET, 'BBB')])
+    wm = fusion.RawWatermark()
+    assert fusion.pending_symbols(db, ['AAA', 'BBB', 'CCC'], wm, 0.0) == {'AAA', 'BBB', 'CCC'}
+    assert wm.low == 2
+    assert fusion.pending_symbols(db, ['AAA', 'BBB', 'CCC'], wm, 1.0) == set()
+
+
+def test_only_symbols_with_new_rows_are_due(fusion):
+    db = FakeRawDB(fusion.MARKET)
+    wm = fusion.RawWatermark()
+    fusion.pending_symbols(db, ['AAA', 'BBB'], wm, 0.0)
+    db.rows += [(1, fusion.MARKET, 'AAA'), (2, fusion.MARKET, 'ZZZ'), (3, 'other', 'BBB')]
+    assert fusion.pending_symbols(db, ['AAA', 'BBB'], wm, 1.0) == {'AAA'}
+
+
+def test_global_news_fans_out_to_every_symbol(fusion):
+    db = FakeRawDB(fusion.MARKET)
+    wm = fusion.RawWatermark()
+    fusion.pending_symbols(db, ['AAA', 'BBB'], wm, 0.0)
+    db.add(1, fusion.NEWS_SYM)
+    assert fusion.pending_symbols(db, ['AAA', 'BBB'], wm, 1.0) == {'AAA', 'BBB'}
+
+
+def test_rows_committed_out_of_id_order_are_not_missed(fusion):
+    db = FakeRawDB(fusion.MARKET)
+    wm = fusion.RawWatermark(grace_sec=60)
+    fusion.pending_symbols(db, ['AAA', 'BBB'], wm, 0.0)
+    db.add(2, 'BBB')  # id 1 still uncommitted
+    assert fusion.pending_symbols(db, ['AAA', 'BBB'], wm, 1.0) == {'BBB'}
+    assert wm.low == 0
+    db.add(1, 'AAA')
+    assert fusion.pending_symbols(db, ['AAA', 'BBB'], wm, 2.0) == {'AAA'}
+    assert wm.low == 2 and not wm.seen
+
+
+def test_stale_gap_is_skipped_in_one_step(fusion):
+    db = FakeRawDB(fusion.MARKET)
+    wm = fusion.RawWatermark(grace_sec=60)
+    fusion.pending_symbols(db, ['AAA'], wm, 0.0)
+    db.add(10_000_000, 'AAA')  # huge auto-increment jump
+    assert fusion.pending_symbols(db, ['AAA'], wm, 1.0) == {'AAA'}
+    assert wm.low == 0
+    assert fusion.pending_symbols(db, ['AAA'], wm, 100.0) == set()
+    assert wm.low == 10_000_000 and not wm.seen
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_runner_fuses_new_and_idle_symbols_only(fusion, monkeypatch):
+    db = FakeRawDB(fusion.MARKET)
+    clock = FakeClock()
+    batches = []
+    monkeypatch.setattr(fusion, 'DB', lambda: db)
+    monkeypatch.setattr(fusion, 'time', clock)
+    monkeypatch.setattr(fusion, 'get_symbols', lambda: ['AAA', 'BBB', 'CCC'])
+    monkeypatch.setattr(fusion, 'fuse_symbols', lambda db, batch: batches.append(batch))
+    from profiler import CycleProfiler
+    run = fusion.make_runner(CycleProfiler())
+
+    run()  # first tick: everything
+    clock.now = 5.0
+    run()  # nothing new, nothing idle
+    db.add(1, 'BBB')
+    clock.now = 10.0
+    run()
+    clock.now = fusion.FUSE_MAX_IDLE_SEC + 1
+    run()  # AAA/CCC idle since t=0; BBB fused at t=10
+    assert batches == [['AAA', 'BBB', 'CCC'], ['BBB'], ['AAA', 'CCC']]
+
+
+def test_idle_refresh_stays_inside_freshness_budget(fusion):
+    assert fusion.FUSE_MAX_IDLE_SEC <= fusion.FRESHNESS_SECONDS / 2
+
+
+def test_load_window_matches_symbols_case_insensitively(fusion):
+    class WindowDB:
+        def exec(self, q, args=None):
+            return [
+                (fusion.NEWS_SYM, 'news', 0, 0.5, 1.0),
+                ('aaa', 'reddit', 60, -0.5, 1.0),
+                ('ZZZ', 'stocktwits', 60, 1.0, 1.0),  # not in the batch
+            ]
+
+    group, age, score, quality = fusion.load_window(WindowDB(), ['AAA', 'BBB'])
+    assert list(group) == [2, 0]
+    assert list(score) == [75.0, 25.0]
@@ -0,0 +1,46 @@
+import sys
+import time
+import pytest
+sys.path.append('workers')
+from profiler import CycleProfiler
+
+
+def _busy(sec):
+    end = time.monotonic() + sec
+    while time.monotonic() < end:
+        sum(range(1000))
+
+
+def test_cycle_writes_folded_profile(tmp_path):
+    prof = CycleProfiler(str(tmp_path), interval=0.001)
+    with prof.cycle('fusion'):  # not armed: nothing written
+        _busy(0.01)
+    assert list(tmp_path.iterdir()) == []
+    prof.request()
+    with prof.cycle('fusion'):
+        _busy(0.1)
+    (path,) = tmp_path.glob('fusion-*.folded')
+    lines = path.read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0 and stack
+    assert any('_busy' in line for line in lines)
+
+
+def test_dump_failure_does_not_break_cycle(tmp_path):
+    blocker = tmp_path / 'not-a-dir'
+    blocker.write_text('')
+    prof = CycleProfiler(str(blocker / 'profiles'), interval=0.001)
+    prof.request()
+    with prof.cycle('fusion'):
+        _busy(0.01)
+
+
+def test_cycle_error_propagates_unchanged(tmp_path):
+    blocker = tmp_path / 'not-a-dir'
+    blocker.write_text('')
+    prof = CycleProfiler(str(blocker / 'profiles'), interval=0.001)
+    prof.request()
+    with pytest.raises(ValueError):
+        with prof.cycle('fusion'):
+            raise ValueError('boom')
@@ -0,0 +1,36 @@
+import sys
+import pytest
+sys.path.append('workers')
+pytest.importorskip('MySQLdb')  # workers/utils.py needs the DB driver
+from scheduler import next_run_at, _ingest_cycle
+from profiler import CycleProfiler
+
+
+def test_next_run_keeps_fixed_rate():
+    # a 3s run on a 10s interval sleeps 7s, not 10s
+    assert next_run_at(100.0, 103.0, 10.0) == 110.0
+
+
+def test_next_run_skips_overrun_ticks_and_keeps_phase():
+    assert next_run_at(100.0, 125.0, 10.0) == 130.0
+    assert next_run_at(100.0, 130.0, 10.0) == 130.0
+
+
+def test_next_run_backoff_grows_and_is_capped():
+    assert next_run_at(100.0, 105.0, 10.0, failures=1, max_backoff=60) == 115.0
+    assert next_run_at(100.0, 105.0, 10.0, failures=3, max_backoff=60) == 145.0
+    assert next_run_at(100.0, 105.0, 10.0, failures=10, max_backoff=60) == 165.0
+
+
+def test_ingest_cycle_reraises():
+    def boom():
+        raise RuntimeError('scorer down')
+    with pytest.raises(RuntimeError):
+        _ingest_cycle(boom, 'news', CycleProfiler())()
+
+
+def test_ingest_cycle_is_profiled(tmp_path):
+    prof = CycleProfiler(str(tmp_path), interval=0.001)
+    prof.request()
+    assert _ingest_cycle(lambda: 3, 'stocktwits', prof)() == 3
+    assert list(tmp_path.glob('stocktwits-*.folded'))
@@ -0,0 +1,87 @@
+import sys
+import pytest
+sys.path.append('workers')
+pytest.importorskip('MySQLdb')  # workers/utils.py needs the DB driver
+from sharding import LeaseShard, StaticShard, owner
+
+SYMBOLS = [f"SYM{i}" for i in range(500)]
+
+
+class FakeDB:
+    def __init__(self, workers):
+        self.workers = list(workers)
+
+    def live_workers(self, market=None):
+        return list(self.workers)
+
+
+def test_static_shards_partition_the_watchlist():
+    parts = [set(StaticShard(i, 4).owned(None, SYMBOLS)) for i in range(4)]
+    assert set().union(*parts) == set(SYMBOLS)
+    assert sum(len(p) for p in parts) == len(SYMBOLS)
+    assert all(parts)
+
+
+def test_lease_shards_partition_the_watchlist():
+    db = FakeDB(['a', 'b', 'c'])
+    parts = [set(LeaseShard(w, market='crypto').owned(db, SYMBOLS)) for w in db.workers]
+    assert set().union(*parts) == set(SYMBOLS)
+    assert sum(len(p) for p in parts) == len(SYMBOLS)
+
+
+def test_adding_or_removing_a_member_moves_only_its_symbols():
+    before = {s: owner(s, ['a', 'b', 'c']) for s in SYMBOLS}
+    after = {s: owner(s, ['a', 'b']) for s in SYMBOLS}
+    moved = {s for s in SYMBOLS if before[s] != after[s]}
+    assert moved == {s for s in SYMBOLS if before[s] == 'c'}
+    grown = {s: owner(s, ['a', 'b', 'c', 'd']) for s in SYMBOLS}
+    assert all(grown[s] in (before[s], 'd') for s in SYMBOLS)
+
+
+def test_lease_shard_always_counts_itself_live():
+    shard = LeaseShard('me', market='crypto')
+    assert shard.owned(FakeDB([]), SYMBOLS) == SYMBOLS
+
+
+@pytest.mark.parametrize('index,count', [(4, 4), (-1, 4), (0, 0)])
+def test_static_shard_rejects_out_of_range_index(index, count):
+    with pytest.raises(ValueError):
+        StaticShard(index, count)
+
+
+class LeaseDB:
+    def __init__(self):
+        self.renewals = 0
+
+    def renew_lease(self, worker_id, ttl_sec, market=None):
+        self.renewals += 1
+
+
+def test_heartbeat_stops_when_fusion_stalls(monkeypatch):
+    import sharding
+    now = [1000.0]
+    monkeypatch.setattr(sharding.time, 'monotonic', lambda: now[0])
+    shard = LeaseShard('me', ttl_sec=30, market='crypto')
+    db = LeaseDB()
+    assert shard.heartbeat(db)
+    now[0] += 31  # no fusion tick completed within the TTL
+    assert not shard.heartbeat(db)
+    shard.mark_progress()
+    assert shard.heartbeat(db)
+    assert db.renewals == 2
+
+
+def test_default_worker_id_fits_lease_column():
+    from sharding import MAX_WORKER_ID_LEN, default_worker_id
+    assert default_worker_id('host', 42) == 'host-42'
+    long_a = default_worker_id('a' * 63, 42)
+    long_b = default_worker_id('a' * 63, 43)
+    assert len(long_a) <= MAX_WORKER_ID_LEN and long_a != long_b
+
+
+def test_shard_from_env_rejects_long_shard_id(monkeypatch):
+    from sharding import shard_from_env
+    monkeypatch.setenv('SHARD_MODE', 'lease')
+    monkeypatch.setenv('SHARD_ID', 'x' * 65)
+    with pytest.raises(ValueError):
+        shard_from_env()
@@ -0,0 +1,98 @@
+"""Time-decayed, quality-weighted scoring kernels for fusion.
+
+A row of age ``a`` and quality ``q`` weighs ``q * 2 ** (-a / half_life)``;
+a falsy ``half_life`` disables decay. Rows are tagged with an integer group
+(one per symbol) so every symbol is scored in a single pass.
+"""
+import numpy as np
+
+
+def decay_weights(age, quality, half_life):
+    w = np.clip(np.asarray(quality, dtype=float), 0, None)
+    if half_life:
+        w = w * np.exp2(-np.clip(np.asarray(age, dtype=float), 0, None) / half_life)
+    return w
+
+
+def grouped_wavg(group, values, weights, n_groups):
+    """Return per-group weighted means (NaN where a group has no weight) and weight sums."""
+    num = np.bincount(group, weights=weights * values, minlength=n_groups)
+    den = np.bincount(group, weights=weights, minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(den > 0, num / den, np.nan)
+    return mean, den
+
+
+def decayed_wavg(group, age, score, quality, n_groups, half_life):
+    """Decayed weighted mean of ``score`` per group plus the row count per group."""
+    group = np.asarray(group, dtype=np.intp)
+    w = decay_weights(age, quality, half_life)
+    mean, _ = grouped_wavg(group, np.asarray(score, dtype=float), w, n_groups)
+    return mean, np.bincount(group, minlength=n_groups)
+
+
+REBASE_HALF_LIVES = 64  # keeps the anchor-relative scale far from float overflow
+
+
+class DecayedSum:
+    """Per-group decayed sums that can be maintained row by row.
+
+    Contributions are stored scaled to an ``anchor`` time rather than decayed
+    in place, so removing a row subtracts what adding it added and rounding
+    does not accumulate from repeated decay steps. The anchor defaults to the
+    first timestamp added and moves forward automatically once new rows are
+    ``REBASE_HALF_LIVES`` half-lives past it. A per-group row count decides
+    emptiness, since float sums rarely return to exactly zero.
+    """
+
+    def __init__(self, n_groups, half_life, anchor=None):
+        self.half_life = half_life
+        self.anchor = None if anchor is None else float(anchor)
+        self.num = np.zeros(n_groups)
+        self.den = np.zeros(n_groups)
+        self.count = np.zeros(n_groups, dtype=np.int64)
+
+    def _scale(self, t):
+        t = np.asarray(t, dtype=float)
+        if not self.half_life or self.anchor is None:
+            return np.ones_like(t)
+        return np.exp2((t - self.anchor) / self.half_life)
+
+    def add(self, group, t, score, quality):
+        t = np.asarray(t, dtype=float)
+        if t.size and self.half_life:
+            latest = float(t.max())
+            if self.anchor is None:
+                self.anchor = latest
+            elif (latest - self.anchor) / self.half_life > REBASE_HALF_LIVES:
+                self.rebase(latest)
+        w = np.clip(np.asarray(quality, dtype=float), 0, None) * self._scale(t)
+        np.add.at(self.num, group, w * np.asarray(score, dtype=float))
+        np.add.at(self.den, group, w)
+        np.add.at(self.count, group, 1)
+
+    def remove(self, group, t, score, quality):
+        w = np.clip(np.asarray(quality, dtype=float), 0, None) * self._scale(t)
+        np.subtract.at(self.num, group, w * np.asarray(score, dtype=float))
+        np.subtract.at(self.den, group, w)
+        np.subtract.at(self.count, group, 1)
+        empty = self.count <= 0
+        self.num[empty] = 0.0  # drop rounding residue
+        self.den[empty] = 0.0
+        self.count[empty] = 0
+
+    def mean(self):
+        # the decay factor to "now" is common to num and den, so it cancels
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where((self.count > 0) & (self.den > 0), self.num / self.den, np.nan)
+
+    def weight(self, now):
+        """Total decayed weight per group as seen at time ``now``."""
+        return self.den / self._scale(now)
+
+    def rebase(self, now):
+        if self.anchor is not None:
+            factor = 1.0 / self._scale(now)
+            self.num *= factor
+            self.den *= factor
+        self.anchor = float(now)
@@ -10,15 +10,24 @@ from utils import (
     get_regime_adj,
     normalize_from_raw,
     FUSION_LAG,
-    start_metrics_server,
+    FUSION_CYCLE,
+    DB_LATENCY,
     MARKET,
     WEIGHTS,
+    SOURCE_WEIGHTS,
+    FRESHNESS_SECONDS,
 )
+from decay import decayed_wavg
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 FUSE_WINDOW_MIN = int(os.getenv('FUSE_WINDOW_MIN','120'))
+HALF_LIFE_SEC = float(os.getenv('FUSE_HALF_LIFE_MIN','30')) * 60  # 0 disables decay
+POLL_SEC = int(os.getenv('FUSION_POLL_SEC','5'))
+# idle symbols are re-fused well inside the market's freshness budget
+FUSE_MAX_IDLE_SEC = min(int(os.getenv('FUSE_MAX_IDLE_SEC','300')), FRESHNESS_SECONDS / 2)
+FUSE_GAP_GRACE_SEC = int(os.getenv('FUSE_GAP_GRACE_SEC','60'))
 W_NEWS = WEIGHTS.get('news', 0.5)
 W_SOC = WEIGHTS.get('social', 0.5)
 
@@ -27,80 +36,142 @@ SIZE_UP = int(os.getenv('SIZE_UP','70'))
 
 NEWS_SYM = 'GLOBAL'  # news scored as GLOBAL; we apply it to all symbols equally by default
 
-def wavg(values, weights):
-    import numpy as np
-    v = np.array(values)
-    w = np.clip(np.array(weights), 0, None)
-    if len(v) == 0:
-        return None
-    return float((v*w).sum() / (w.sum() + 1e-9))
+def load_window(db, symbols):
+    """Load every in-window row for ``symbols`` in one query.
 
-def load_recent(db, symbol, source):
+    Returns ``(group, age_sec, score, quality)`` arrays where ``group`` is the
+    index into ``symbols`` and ``len(symbols)`` marks GLOBAL news rows.
+    """
     q = (
-        "SELECT raw_score, quality FROM sentiment_raw "
-        "WHERE ts >= NOW() - INTERVAL %s MINUTE AND market=%s AND symbol=%s AND source=%s"
+        "SELECT symbol, source, TIMESTAMPDIFF(SECOND, ts, NOW()), raw_score, quality FROM sentiment_raw "
+        "WHERE ts >= NOW() - INTERVAL %s MINUTE AND market=%s AND ("
+        "(symbol=%s AND source='news') OR "
+        "(symbol IN (" + ",".join(["%s"] * len(symbols)) + ") AND source IN ('stocktwits','reddit')))"
     )
-    rows = db.exec(q, (FUSE_WINDOW_MIN, MARKET, symbol, source))
-    scores = [normalize_from_raw(r[0]) for r in rows]  # -> 0..100
-    weights = [r[1] for r in rows]
-    return scores, weights
-
-def fuse_symbol(db, symbol):
-    # compute staleness before inserting new record
-    last = db.exec(
-        "SELECT ts FROM sentiment_agg WHERE market=%s AND symbol=%s ORDER BY ts DESC LIMIT 1",
-        (MARKET, symbol),
-    )
-    last_ts = last[0][0] if last else None
-    # news: GLOBAL
-    n_scores, n_weights = load_recent(db, NEWS_SYM, 'news')
-    s_scores, s_weights = [], []
-    for src in ('stocktwits','reddit'):
-        xs, ws = load_recent(db, symbol, src)
-        s_scores += xs
-        s_weights += ws
-
-    import numpy as np
-    news_score = np.clip(wavg(n_scores, n_weights), 0, 100) if n_scores else None
-    social_score = np.clip(wavg(s_scores, s_weights), 0, 100) if s_scores else None
-
-    ns = news_score if news_score is not None else 50.0
-    ss = social_score if social_score is not None else 50.0
+    with DB_LATENCY.labels(query='load_window').time():
+        rows = db.exec(q, (FUSE_WINDOW_MIN, MARKET, NEWS_SYM, *symbols))
+    # MySQL's default collation matches symbols case-insensitively; fold to match it
+    index = {s.casefold(): i for i, s in enumerate(symbols)}
+    news_group = len(symbols)
+    rows = [r for r in rows if r[1] == 'news' or r[0].casefold() in index]
+    group = np.array([news_group if r[1] == 'news' else index[r[0].casefold()] for r in rows], dtype=np.intp)
+    age = np.array([r[2] for r in rows], dtype=float)
+    raw = np.array([r[3] for r in rows], dtype=float)
+    quality = np.nan_to_num(np.array([r[4] for r in rows], dtype=float), nan=1.0)  # column default
+    quality *= np.array([SOURCE_WEIGHTS.get(r[1], 1.0) for r in rows], dtype=float)
+    keep = ~np.isnan(raw)
+    score = normalize_from_raw(raw[keep])  # -> 0..100
+    return group[keep], age[keep], score, quality[keep]
+
+def fuse_symbols(db, symbols):
+    if not symbols:
+        return
+    # compute staleness before inserting new records
+    with DB_LATENCY.labels(query='last_agg').time():
+        last = db.exec(
+            "SELECT symbol, MAX(ts) FROM sentiment_agg WHERE market=%s AND symbol IN ("
+            + ",".join(["%s"] * len(symbols)) + ") GROUP BY symbol",
+            (MARKET, *symbols),
+        )
+    last_ts = dict(last)
+
+    group, age, score, quality = load_window(db, symbols)
+    means, counts = decayed_wavg(group, age, score, quality, len(symbols) + 1, HALF_LIFE_SEC)
+    means = np.clip(np.nan_to_num(means, nan=50.0), 0, 100)
+    ns = float(means[-1])
+    ss = means[:-1]
 
     regime = get_regime_adj(float(os.getenv('REGIME_MIN','0.6')))
-    mood = regime * (W_NEWS*ns + W_SOC*ss)
-    mood = float(np.clip(mood, 0, 100))
-
-    rec = {
-        'ts': now_utc(),
-        'news_score': ns,
-        'social_score': ss,
-        'mood_score': mood,
-        'regime_adj': regime,
-        'details': { 'n_news': len(n_scores), 'n_social': len(s_scores) }
-    }
-    db.upsert_agg(symbol, rec, market=MARKET)
-    if last_ts:
-        lag = (dt.datetime.utcnow() - last_ts).total_seconds()
-        FUSION_LAG.labels(symbol=symbol).set(lag)
-
-def loop():
+    mood = np.clip(regime * (W_NEWS*ns + W_SOC*ss), 0, 100)
+
+    ts = now_utc()
+    for i, symbol in enumerate(symbols):
+        rec = {
+            'ts': ts,
+            'news_score': ns,
+            'social_score': float(ss[i]),
+            'mood_score': float(mood[i]),
+            'regime_adj': regime,
+            'details': { 'n_news': int(counts[-1]), 'n_social': int(counts[i]) }
+        }
+        db.upsert_agg(symbol, rec, market=MARKET)
+        if last_ts.get(symbol):
+            lag = (dt.datetime.utcnow() - last_ts[symbol]).total_seconds()
+            FUSION_LAG.labels(symbol=symbol).set(lag)
+
+class RawWatermark:
+    """Tracks which ``sentiment_raw`` ids fusion has already seen.
+
+    InnoDB hands out auto-increment ids before commit, so concurrent writers
+    can make id N+1 visible before id N. Ids above the contiguous watermark
+    ``low`` are re-scanned until the hole below them fills, or until the id
+    just above the hole was first seen more than ``grace_sec`` ago; the whole
+    hole is then skipped in one step (rolled-back inserts and auto-increment
+    jumps leave permanent holes).
+    """
+
+    def __init__(self, grace_sec=None):
+        self.grace_sec = FUSE_GAP_GRACE_SEC if grace_sec is None else grace_sec
+        self.low = None
+        self.seen = {}  # id above ``low`` -> when it was first seen
+
+    def poll(self, db, now):
+        """Return ``(market, symbol)`` of rows first seen by this poll, or ``None`` on the first call."""
+        if self.low is None:
+            rows = db.exec("SELECT COALESCE(MAX(id), 0) FROM sentiment_raw")
+            self.low = rows[0][0]
+            return None
+        # every market is scanned so the other market's ids are not mistaken for holes
+        rows = db.exec("SELECT id, market, symbol FROM sentiment_raw WHERE id > %s", (self.low,))
+        fresh = [(m, s) for i, m, s in rows if i not in self.seen]
+        for r in rows:
+            self.seen.setdefault(r[0], now)
+        for i in sorted(self.seen):
+            if i != self.low + 1 and now - self.seen[i] < self.grace_sec:
+                break
+            del self.seen[i]
+            self.low = i
+        return fresh
+
+def pending_symbols(db, symbols, watermark, now):
+    """Return the symbols with raw rows committed since the previous call."""
+    with DB_LATENCY.labels(query='pending').time():
+        fresh = watermark.poll(db, now)
+    if fresh is None:  # first call: everything is due
+        return set(symbols)
+    changed = {sym for mkt, sym in fresh if mkt == MARKET}
+    if NEWS_SYM in changed:  # GLOBAL news feeds every symbol
+        return set(symbols)
+    return changed & set(symbols)
+
+def make_runner(profiler, shard=None):
+    """Build the scheduled fusion callable; fuses only this shard's symbols with new raw rows."""
     db = DB()
-    symbols = get_symbols()
-    while True:
-        try:
-            for sym in symbols:
-                fuse_symbol(db, sym)
-        except Exception:
-            logger.exception("fusion loop error")
-        time.sleep(30)
+    # A failed tick makes the scheduler rebuild this runner; the fresh
+    # watermark's first poll marks every symbol due, so nothing polled is lost.
+    watermark = RawWatermark()
+    fused = {}
+
+    def tick():
+        symbols = shard.owned(db, get_symbols()) if shard else get_symbols()
+        now = time.monotonic()
+        due = pending_symbols(db, symbols, watermark, now)
+        # refresh idle symbols so decay and rows ageing out of the window are reflected
+        due |= {s for s in symbols if now - fused.get(s, float('-inf')) >= FUSE_MAX_IDLE_SEC}
+        batch = [s for s in symbols if s in due]
+        if batch:
+            fuse_symbols(db, batch)
+            fused.update(dict.fromkeys(batch, now))
+
+    def run():
+        with FUSION_CYCLE.time(), profiler.cycle('fusion'):
+            tick()
+        if shard:
+            shard.mark_progress()
+
+    return run
 
 if __name__ == '__main__':
-    # Simple supervisor: spawn workers in this container
-    import threading
-    import worker_news, worker_stocktwits
-
-    start_metrics_server()
-    threading.Thread(target=worker_news.main, daemon=True).start()
-    threading.Thread(target=worker_stocktwits.main, daemon=True).start()
-    loop()
+    # Fusion only; run scheduler.py to co-host the ingestion jobs in this process
+    from scheduler import main
+    main(['fusion'])
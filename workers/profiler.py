@@ -0,0 +1,116 @@
+"""Opt-in sampling profiler for worker cycles.
+
+Set ``PROFILE_DIR`` to enable. A capture is armed by sending ``SIGUSR1`` to
+the process or, when ``PROFILE_PORT`` is set, by requesting
+``http://host:PROFILE_PORT/profile``. The next cycle wrapped in
+:meth:`CycleProfiler.cycle` is sampled and written to ``PROFILE_DIR`` in
+collapsed-stack format, ready for ``flamegraph.pl`` or speedscope.
+"""
+import os
+import sys
+import signal
+import logging
+import threading
+import contextlib
+import datetime as dt
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class CycleProfiler:
+    def __init__(self, out_dir=None, interval=0.005):
+        self.out_dir = out_dir
+        self.interval = interval
+        self._armed = threading.Event()
+
+    @property
+    def enabled(self):
+        return bool(self.out_dir)
+
+    def request(self):
+        """Arm a capture of the next profiled cycle."""
+        if self.enabled:
+            self._armed.set()
+
+    @contextlib.contextmanager
+    def cycle(self, name):
+        if not self._armed.is_set():
+            yield
+            return
+        self._armed.clear()
+        stacks = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), stacks, stop),
+            daemon=True,
+        )
+        sampler.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+            try:
+                self._dump(name, stacks)
+            except Exception:  # never let the opt-in profiler fail a cycle
+                logger.exception("failed to write %s profile to %s", name, self.out_dir)
+
+    def _sample(self, ident, stacks, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(ident)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                stacks[";".join(reversed(stack))] += 1
+
+    def _dump(self, name, stacks):
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = dt.datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(self.out_dir, f"{name}-{stamp}.folded")
+        with open(path, 'w') as fh:
+            for stack, count in stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+        logger.info("wrote %s profile (%d samples) to %s", name, sum(stacks.values()), path)
+
+
+def _serve_trigger(profiler, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/profile':
+                self.send_error(404)
+                return
+            profiler.request()
+            self.send_response(202)
+            self.end_headers()
+            self.wfile.write(b"profile armed\n")
+
+        do_POST = do_GET
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+
+def install_profiler():
+    """Create the process-wide profiler and register its triggers."""
+    profiler = CycleProfiler(
+        out_dir=os.getenv('PROFILE_DIR') or None,
+        interval=float(os.getenv('PROFILE_INTERVAL_SEC', '0.005')),
+    )
+    if not profiler.enabled:
+        return profiler
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.request())
+    port = os.getenv('PROFILE_PORT')
+    if port:
+        _serve_trigger(profiler, int(port))
+    logger.info("cycle profiler enabled, writing to %s", profiler.out_dir)
+    return profiler
@@ -0,0 +1,165 @@
+"""Fixed-rate scheduler for the ingestion and fusion jobs.
+
+Each job runs on its own thread at a fixed rate anchored to its first start,
+so a slow run shortens the following sleep instead of pushing every later
+run back; ticks missed entirely are skipped. A failing job is rebuilt from
+its factory after an exponential backoff without affecting the others.
+
+Select the jobs for this process with ``WORKER_JOBS`` or the command line,
+e.g. ``python scheduler.py news stocktwits`` in one container and
+``python scheduler.py fusion`` in another.
+"""
+import os
+import sys
+import math
+import time
+import signal
+import logging
+import threading
+from utils import DB, SCHEDULE_LAG, JOB_FAILURES, INGEST_ERRORS, start_metrics_server
+from profiler import install_profiler
+from sharding import LeaseShard, shard_from_env
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SEC = float(os.getenv('JOB_MAX_BACKOFF_SEC', '300'))
+SUPERVISE_SEC = float(os.getenv('JOB_SUPERVISE_SEC', '5'))
+
+
+def next_run_at(scheduled, now, interval, failures=0, max_backoff=MAX_BACKOFF_SEC):
+    """Return the monotonic time of the next run after one finished at ``now``."""
+    if failures:
+        return now + min(interval * 2 ** (failures - 1), max_backoff)
+    nxt = scheduled + interval
+    if nxt < now:  # overran one or more ticks: skip them but keep the phase
+        nxt += math.ceil((now - nxt) / interval) * interval
+    return nxt
+
+
+class Job:
+    def __init__(self, name, interval, factory, max_backoff=MAX_BACKOFF_SEC):
+        self.name = name
+        self.interval = interval
+        self.factory = factory  # returns the callable run on every tick
+        self.max_backoff = max_backoff
+        self.thread = None
+
+    def start(self, stop):
+        self.thread = threading.Thread(target=self._run, args=(stop,), name=self.name, daemon=True)
+        self.thread.start()
+
+    def alive(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self, stop):
+        fn = None
+        failures = 0
+        scheduled = time.monotonic()
+        while not stop.is_set():
+            SCHEDULE_LAG.labels(job=self.name).set(max(0.0, time.monotonic() - scheduled))
+            try:
+                if fn is None:
+                    fn = self.factory()
+                fn()
+                failures = 0
+            except Exception:
+                failures += 1
+                fn = None  # rebuild connections/state on the next attempt
+                logger.exception("job %s failed (%d consecutive)", self.name, failures)
+                JOB_FAILURES.labels(job=self.name).inc()
+            scheduled = next_run_at(scheduled, time.monotonic(), self.interval, failures, self.max_backoff)
+            stop.wait(max(0.0, scheduled - time.monotonic()))
+
+
+class Scheduler:
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.stop = threading.Event()
+
+    def run(self):
+        for job in self.jobs:
+            job.start(self.stop)
+        while not self.stop.wait(SUPERVISE_SEC):
+            for job in self.jobs:
+                if not job.alive():
+                    logger.error("job %s thread exited; restarting", job.name)
+                    JOB_FAILURES.labels(job=job.name).inc()
+                    job.start(self.stop)
+
+
+def _ingest_cycle(run_once, source, profiler):
+    """Profile an ingestion cycle and keep its failures in ``ingest_errors_total``."""
+    def run():
+        try:
+            with profiler.cycle(source):
+                return run_once()
+        except Exception:
+            INGEST_ERRORS.labels(source=source).inc()
+            raise
+    return run
+
+
+def _news_job(profiler, shard):
+    import worker_news
+    return Job('news', worker_news.POLL_SEC, lambda: _ingest_cycle(worker_news.run_once, 'news', profiler))
+
+
+def _stocktwits_job(profiler, shard):
+    import worker_stocktwits
+    return Job(
+        'stocktwits',
+        worker_stocktwits.POLL_SEC,
+        lambda: _ingest_cycle(worker_stocktwits.run_once, 'stocktwits', profiler),
+    )
+
+
+def _fusion_job(profiler, shard):
+    import fusion
+    return Job('fusion', fusion.POLL_SEC, lambda: fusion.make_runner(profiler, shard))
+
+
+def _lease_job(shard):
+    def factory():
+        db = DB()
+        return lambda: shard.heartbeat(db)
+    # backoff must stay below the TTL or a flaky DB lets the lease lapse
+    return Job('shard-lease', shard.heartbeat_sec, factory, max_backoff=shard.heartbeat_sec)
+
+
+JOBS = {
+    'news': _news_job,
+    'stocktwits': _stocktwits_job,
+    'fusion': _fusion_job,
+}
+
+
+def main(names=None):
+    if not names:
+        names = [n.strip() for n in os.getenv('WORKER_JOBS', 'news,stocktwits,fusion').split(',') if n.strip()]
+    unknown = [n for n in names if n not in JOBS]
+    if unknown:
+        raise SystemExit(f"unknown jobs: {', '.join(unknown)} (choose from {', '.join(JOBS)})")
+    shard = None
+    if 'fusion' in names:
+        try:
+            shard = shard_from_env()
+        except ValueError as exc:
+            raise SystemExit(f"invalid shard configuration: {exc}")
+    start_metrics_server()
+    profiler = install_profiler()
+    jobs = [JOBS[n](profiler, shard) for n in names]
+    if isinstance(shard, LeaseShard):
+        jobs.append(_lease_job(shard))
+    scheduler = Scheduler(jobs)
+    signal.signal(signal.SIGTERM, lambda signum, frame: scheduler.stop.set())
+    logger.info("scheduler running jobs: %s", ', '.join(j.name for j in jobs))
+    try:
+        scheduler.run()
+    finally:
+        if shard is not None:
+            shard.release()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,125 @@
+"""Split the fusion watchlist across worker processes.
+
+Symbols are assigned with rendezvous (highest-random-weight) hashing, so when
+a worker joins or leaves only the symbols it owned move. Two modes are
+available via ``SHARD_MODE``:
+
+- ``static``: this worker is ``SHARD_INDEX`` of ``SHARD_COUNT``.
+- ``lease``: workers heartbeat a row in ``fusion_leases`` every third of
+  ``SHARD_LEASE_TTL_SEC`` for as long as their fusion ticks keep completing;
+  the live set is whoever holds an unexpired lease, so the symbols of a dead
+  or stalled worker are picked up by the others once its lease runs out. A
+  worker shutting down cleanly deletes its lease right away.
+"""
+import os
+import time
+import socket
+import hashlib
+import logging
+from utils import DB, SHARD_SYMBOLS, SHARD_WORKERS, MARKET
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKER_ID_LEN = 64  # fusion_leases.worker_id is VARCHAR(64)
+
+
+def _weight(key, member):
+    digest = hashlib.sha1(f"{member}:{key}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def owner(key, members):
+    """Return the member that owns ``key``."""
+    return max(members, key=lambda m: _weight(key, m))
+
+
+class StaticShard:
+    def __init__(self, index, count):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"shard index {index} out of range for {count} shards")
+        self.index = index
+        self.count = count
+
+    def owned(self, db, symbols):
+        mine = [s for s in symbols if owner(s, range(self.count)) == self.index]
+        SHARD_WORKERS.set(self.count)
+        SHARD_SYMBOLS.set(len(mine))
+        return mine
+
+    def mark_progress(self):
+        pass
+
+    def release(self):
+        pass
+
+
+class LeaseShard:
+    def __init__(self, worker_id, ttl_sec=30, market=None):
+        if ttl_sec <= 0:
+            raise ValueError(f"lease TTL must be positive, got {ttl_sec}")
+        self.worker_id = worker_id
+        self.ttl_sec = ttl_sec
+        self.market = market or MARKET
+        self._members = None
+        self._progress = time.monotonic()
+
+    @property
+    def heartbeat_sec(self):
+        return self.ttl_sec / 3
+
+    def mark_progress(self):
+        """Record a completed fusion tick; the lease is only renewed while these keep coming."""
+        self._progress = time.monotonic()
+
+    def heartbeat(self, db):
+        """Renew this worker's lease unless fusion has stalled for longer than the TTL."""
+        stalled = time.monotonic() - self._progress
+        if stalled > self.ttl_sec:
+            logger.warning("fusion stalled for %.0fs; letting lease %s expire", stalled, self.worker_id)
+            return False
+        db.renew_lease(self.worker_id, self.ttl_sec, market=self.market)
+        return True
+
+    def release(self):
+        """Drop this worker's lease so peers take over its symbols immediately."""
+        try:
+            DB().release_lease(self.worker_id, market=self.market)
+        except Exception:
+            logger.exception("failed to release fusion lease %s", self.worker_id)
+
+    def owned(self, db, symbols):
+        members = sorted(set(db.live_workers(market=self.market)) | {self.worker_id})
+        if members != self._members:
+            logger.info("fusion shard members for %s: %s", self.market, ', '.join(members))
+            self._members = members
+        mine = [s for s in symbols if owner(s, members) == self.worker_id]
+        SHARD_WORKERS.set(len(members))
+        SHARD_SYMBOLS.set(len(mine))
+        return mine
+
+
+def default_worker_id(host=None, pid=None):
+    """Return ``hostname-pid``, shortened with a hash suffix to fit ``fusion_leases``."""
+    worker_id = f"{host or socket.gethostname()}-{pid or os.getpid()}"
+    if len(worker_id) <= MAX_WORKER_ID_LEN:
+        return worker_id
+    digest = hashlib.sha1(worker_id.encode('utf-8')).hexdigest()[:12]
+    return f"{worker_id[:MAX_WORKER_ID_LEN - 13]}-{digest}"
+
+
+def shard_from_env():
+    """Return the configured shard, or ``None`` to fuse the whole watchlist.
+
+    Raises ``ValueError`` for an invalid configuration.
+    """
+    mode = os.getenv('SHARD_MODE', '').strip().lower()
+    if mode in ('', 'none'):
+        return None
+    if mode == 'static':
+        return StaticShard(int(os.getenv('SHARD_INDEX', '0')), int(os.getenv('SHARD_COUNT', '1')))
+    if mode == 'lease':
+        worker_id = os.getenv('SHARD_ID') or default_worker_id()
+        if len(worker_id) > MAX_WORKER_ID_LEN:
+            raise ValueError(f"SHARD_ID longer than {MAX_WORKER_ID_LEN} characters: {worker_id}")
+        return LeaseShard(worker_id, int(os.getenv('SHARD_LEASE_TTL_SEC', '30')))
+    raise ValueError(f"unknown SHARD_MODE: {mode}")
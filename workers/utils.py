@@ -1,5 +1,6 @@
 import os
 import json
+import contextlib
 import datetime as dt
 import importlib
 import pytz
@@ -7,9 +8,9 @@ import MySQLdb as mdb
 import requests
 
 try:  # optional dependency
-    from prometheus_client import Counter, Gauge, start_http_server
+    from prometheus_client import Counter, Gauge, Histogram, start_http_server
 except Exception:  # pragma: no cover - metrics optional
-    Counter = Gauge = None
+    Counter = Gauge = Histogram = None
 
     def start_http_server(*args, **kwargs):  # type: ignore
         pass
@@ -25,6 +26,7 @@ except Exception as exc:  # pragma: no cover - config must exist
 
 WATCHLIST = getattr(_cfg, "WATCHLIST", [])
 WEIGHTS = getattr(_cfg, "WEIGHTS", {})
+SOURCE_WEIGHTS = getattr(_cfg, "SOURCE_WEIGHTS", {})
 REGIME_GAUGE = getattr(_cfg, "REGIME_GAUGE", "")
 FRESHNESS_SECONDS = getattr(_cfg, "FRESHNESS_SECONDS", 300)
 
@@ -33,6 +35,18 @@ if Counter is not None:  # real metrics
     INGESTED = Counter("ingest_items_total", "Number of ingested items", ["source"])
     INGEST_ERRORS = Counter("ingest_errors_total", "Number of ingestion errors", ["source"])
     FUSION_LAG = Gauge("fusion_lag_seconds", "Lag between now and last fused row", ["symbol"])
+    FETCH_LATENCY = Histogram("fetch_latency_seconds", "Latency of source fetches", ["source"])
+    SCORE_LATENCY = Histogram("score_batch_latency_seconds", "Round-trip latency of score_batch calls")
+    DB_LATENCY = Histogram("db_query_latency_seconds", "Latency of database calls", ["query"])
+    FUSION_CYCLE = Histogram(
+        "fusion_cycle_seconds",
+        "Duration of one fusion tick: shard lookup, new-row poll and fusing due symbols",
+        buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    )
+    SCHEDULE_LAG = Gauge("job_schedule_lag_seconds", "Delay between a job's scheduled and actual start", ["job"])
+    JOB_FAILURES = Counter("job_failures_total", "Number of failed scheduled job runs", ["job"])
+    SHARD_SYMBOLS = Gauge("shard_symbols", "Symbols owned by this fusion shard")
+    SHARD_WORKERS = Gauge("shard_workers", "Live fusion shards for this market")
 else:  # fallbacks that expose no-ops
     class _DummyMetric:
         def labels(self, **kwargs):
@@ -44,7 +58,16 @@ else:  # fallbacks that expose no-ops
         def set(self, *args, **kwargs):
             pass
 
+        def observe(self, *args, **kwargs):
+            pass
+
+        def time(self):
+            return contextlib.nullcontext()
+
     INGESTED = INGEST_ERRORS = FUSION_LAG = _DummyMetric()
+    FETCH_LATENCY = SCORE_LATENCY = DB_LATENCY = FUSION_CYCLE = _DummyMetric()
+    SCHEDULE_LAG = JOB_FAILURES = _DummyMetric()
+    SHARD_SYMBOLS = SHARD_WORKERS = _DummyMetric()
 
 
 def start_metrics_server():
@@ -78,7 +101,7 @@ class DB:
             "INSERT INTO sentiment_raw (ts, market, symbol, source, text, raw_score, quality, meta) "
             "VALUES (%s,%s,%s,%s,%s,%s,%s,%s)"
         )
-        with self.conn.cursor() as cur:
+        with DB_LATENCY.labels(query='insert_raw').time(), self.conn.cursor() as cur:
             cur.executemany(
                 q,
                 [
@@ -103,7 +126,7 @@ class DB:
             "VALUES (%s,%s,%s,%s,%s,%s,%s,%s)"
         )
         mkt = market or rec.get('market') or MARKET
-        with self.conn.cursor() as cur:
+        with DB_LATENCY.labels(query='upsert_agg').time(), self.conn.cursor() as cur:
             cur.execute(
                 q,
                 (
@@ -118,6 +141,31 @@ class DB:
                 ),
             )
 
+    def renew_lease(self, worker_id, ttl_sec, market: str | None = None):
+        mkt = market or MARKET
+        q = (
+            "INSERT INTO fusion_leases (market, worker_id, expires_at) "
+            "VALUES (%s, %s, NOW() + INTERVAL %s SECOND) "
+            "ON DUPLICATE KEY UPDATE expires_at = VALUES(expires_at)"
+        )
+        with self.conn.cursor() as cur:
+            cur.execute(q, (mkt, worker_id, ttl_sec))
+            cur.execute("DELETE FROM fusion_leases WHERE market=%s AND expires_at < NOW()", (mkt,))
+
+    def release_lease(self, worker_id, market: str | None = None):
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM fusion_leases WHERE market=%s AND worker_id=%s",
+                (market or MARKET, worker_id),
+            )
+
+    def live_workers(self, market: str | None = None):
+        rows = self.exec(
+            "SELECT worker_id FROM fusion_leases WHERE market=%s AND expires_at > NOW()",
+            (market or MARKET,),
+        )
+        return [r[0] for r in rows]
+
     def get_news_hashes(self, hashes):
         if not hashes:
             return set()
@@ -143,9 +191,10 @@ def now_utc():
 
 def score_batch(texts):
     url = os.getenv('SENTIMENT_URL','http://sentiment:8000/score')
-    r = requests.post(url, json={"texts": texts}, timeout=15)
-    r.raise_for_status()
-    return r.json()["scores"]
+    with SCORE_LATENCY.time():
+        r = requests.post(url, json={"texts": texts}, timeout=15)
+        r.raise_for_status()
+        return r.json()["scores"]
 
 def get_symbols():
     """Return configured symbols for the active market."""
@@ -156,5 +205,5 @@ def get_regime_adj(min_val=0.6):
     return max(min_val, 1.0)
 
 def normalize_from_raw(raw_score):
-    # raw_score stored as -1..1; convert to 0..100
-    return float((raw_score + 1.0) * 50.0)
+    # raw_score stored as -1..1; convert to 0..100 (element-wise on NumPy arrays)
+    return (raw_score + 1.0) * 50.0
@@ -1,8 +1,7 @@
 import os
-import time
 import feedparser
 import logging
-from utils import DB, now_utc, score_batch, INGESTED, INGEST_ERRORS, MARKET
+from utils import DB, now_utc, score_batch, INGESTED, INGEST_ERRORS, FETCH_LATENCY, MARKET
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,7 +22,8 @@ def run_once():
     candidates = []
     for url in FEEDS:
         try:
-            d = feedparser.parse(url)
+            with FETCH_LATENCY.labels(source='news').time():
+                d = feedparser.parse(url)
             for e in d.entries[:30]:
                 title = e.get('title','')
                 summ = e.get('summary','')
@@ -74,13 +74,8 @@ def run_once():
     return len(rows)
 
 def main():
-    while True:
-        try:
-            run_once()
-        except Exception:
-            logger.exception("worker_news cycle error")
-            INGEST_ERRORS.labels(source='news').inc()
-        time.sleep(POLL_SEC)
+    from scheduler import main as run_jobs
+    run_jobs(['news'])
 
 if __name__ == '__main__':
     main()
@@ -1,8 +1,7 @@
 import os
-import time
 import requests
 import logging
-from utils import DB, now_utc, score_batch, get_symbols, INGESTED, INGEST_ERRORS, MARKET
+from utils import DB, now_utc, score_batch, get_symbols, INGESTED, INGEST_ERRORS, FETCH_LATENCY, MARKET
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,7 +32,8 @@ def run_once():
     total = 0
     for sym in symbols:
         try:
-            texts = fetch_stocktwits(sym)
+            with FETCH_LATENCY.labels(source='stocktwits').time():
+                texts = fetch_stocktwits(sym)
             if not texts:
                 continue
             scores = score_batch(texts)
@@ -61,13 +61,8 @@ def run_once():
     return total
 
 def main():
-    while True:
-        try:
-            run_once()
-        except Exception:
-            logger.exception("worker_stocktwits cycle error")
-            INGEST_ERRORS.labels(source='stocktwits').inc()
-        time.sleep(POLL_SEC)
+    from scheduler import main as run_jobs
+    run_jobs(['stocktwits'])
 
 if __name__ == '__main__':
     main()